@@ -2,27 +2,53 @@
 Authentication module for Microsoft Graph API.
 Handles OAuth 2.0 Client Credentials flow with token caching.
 """
+import asyncio
 import httpx
+import random
 import time
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 from threading import Lock
 from config import settings
+from errors import GraphAPIError, GraphAuthError
+
+
+def build_auth_headers(token: str) -> httpx.Headers:
+    """Build Graph API request headers for a bearer token."""
+    return httpx.Headers({
+        "Authorization": f"Bearer {token}",
+        "Accept": "application/json"
+    })
 
 
 class TokenCache:
     """In-memory token cache with expiry tracking."""
     
     def __init__(self):
-        self._token: Optional[str] = None
-        self._expiry: float = 0
+        # (token, expiry, headers) replaced as a whole so readers never see a torn state
+        self._state: Optional[Tuple[str, float, httpx.Headers]] = None
         self._lock = Lock()
     
     def get_token(self) -> Optional[str]:
         """Get cached token if still valid."""
-        with self._lock:
-            if self._token and time.time() < self._expiry:
-                return self._token
-            return None
+        # Lock-free read: swapping the tuple reference is atomic
+        state = self._state
+        if state and time.monotonic() < state[1]:
+            return state[0]
+        return None
+    
+    def get_headers(self) -> Optional[httpx.Headers]:
+        """Get prebuilt request headers for the cached token if still valid."""
+        state = self._state
+        if state and time.monotonic() < state[1]:
+            return state[2]
+        return None
+    
+    def seconds_until_expiry(self) -> float:
+        """Seconds until the cached token should be replaced (0 if none)."""
+        state = self._state
+        if state is None:
+            return 0.0
+        return state[1] - time.monotonic()
     
     def set_token(self, token: str, expires_in: int):
         """
@@ -33,14 +59,96 @@ class TokenCache:
             expires_in: Token lifetime in seconds
         """
         with self._lock:
-            self._token = token
-            # Subtract 5 minutes (300 seconds) as buffer before actual expiry
-            self._expiry = time.time() + expires_in - 300
+            # Subtract 5 minutes (300 seconds) as buffer before actual expiry,
+            # plus up to a minute of jitter so instances don't refresh in lockstep.
+            # Monotonic clock so wall-clock adjustments can't mis-expire tokens.
+            expiry = time.monotonic() + expires_in - 300 - random.uniform(0, 60)
+            self._state = (token, expiry, build_auth_headers(token))
 
 
 # Global token cache instance
 _token_cache = TokenCache()
 
+# Background refresh renews the token this long before the cache drops it,
+# and retries this often after a failed refresh
+TOKEN_REFRESH_AHEAD = 60
+TOKEN_REFRESH_RETRY = 30
+
+_refresh_task: Optional[asyncio.Task] = None
+
+# Serializes token refreshes so concurrent cache misses share one request.
+# asyncio locks are bound to an event loop, so one is created per loop.
+_refresh_lock: Optional[asyncio.Lock] = None
+_refresh_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Shared HTTP client for the token endpoint, created in the app lifespan
+_auth_client: Optional[httpx.AsyncClient] = None
+
+
+async def init_auth_client():
+    """Create the shared HTTP client used for token requests."""
+    global _auth_client
+    if _auth_client is None:
+        _auth_client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+        )
+
+
+async def close_auth_client():
+    """Close the shared HTTP client and release pooled connections."""
+    global _auth_client
+    if _auth_client is not None:
+        await _auth_client.aclose()
+        _auth_client = None
+
+
+async def _refresh_loop():
+    """Keep the cached token fresh so requests never wait on a token fetch."""
+    while True:
+        try:
+            async with _get_refresh_lock():
+                # Skip if a request-path refresh already renewed the token
+                if _token_cache.seconds_until_expiry() <= TOKEN_REFRESH_AHEAD:
+                    await _fetch_token()
+            delay = max(_token_cache.seconds_until_expiry() - TOKEN_REFRESH_AHEAD, TOKEN_REFRESH_RETRY)
+        except Exception:
+            # TODO: Add structured logging for production
+            # get_access_token still fetches on demand while this is failing
+            delay = TOKEN_REFRESH_RETRY
+        
+        await asyncio.sleep(delay)
+
+
+async def start_token_refresh():
+    """Start the background token refresh task, priming the cache immediately."""
+    global _refresh_task
+    if _refresh_task is None:
+        _refresh_task = asyncio.create_task(_refresh_loop())
+
+
+async def stop_token_refresh():
+    """Stop the background token refresh task."""
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
+
+
+def _get_refresh_lock() -> asyncio.Lock:
+    """Return the refresh lock for the running event loop."""
+    global _refresh_lock, _refresh_lock_loop
+    loop = asyncio.get_running_loop()
+    if _refresh_lock is None or _refresh_lock_loop is not loop:
+        _refresh_lock = asyncio.Lock()
+        _refresh_lock_loop = loop
+    return _refresh_lock
+
 
 async def get_access_token() -> str:
     """
@@ -58,7 +166,37 @@ async def get_access_token() -> str:
     if cached_token:
         return cached_token
     
-    # Request new token
+    async with _get_refresh_lock():
+        # Another coroutine may have refreshed the token while we waited
+        cached_token = _token_cache.get_token()
+        if cached_token:
+            return cached_token
+        
+        return await _fetch_token()
+
+
+async def get_auth_headers() -> httpx.Headers:
+    """
+    Get Graph API request headers carrying a valid access token.
+    
+    The headers are built once per token refresh and reused afterwards.
+    
+    Returns:
+        httpx.Headers: Authorization and Accept headers
+    """
+    headers = _token_cache.get_headers()
+    if headers is not None:
+        return headers
+    return build_auth_headers(await get_access_token())
+
+
+async def _fetch_token() -> str:
+    """
+    Request a new access token and store it in the cache.
+    
+    Returns:
+        str: Newly issued access token
+    """
     auth_url = settings.auth_url_template.format(tenant_id=settings.tenant_id)
     
     token_data = {
@@ -68,24 +206,27 @@ async def get_access_token() -> str:
         "grant_type": "client_credentials"
     }
     
+    # Lazily create the client when used outside the FastAPI lifespan
+    if _auth_client is None:
+        await init_auth_client()
+    
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                auth_url,
-                data=token_data,
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
-            )
-            response.raise_for_status()
-            
-            token_response = response.json()
-            access_token = token_response["access_token"]
-            expires_in = token_response.get("expires_in", 3600)
-            
-            # Cache the token
-            _token_cache.set_token(access_token, expires_in)
-            
-            return access_token
-            
+        response = await _auth_client.post(
+            auth_url,
+            data=token_data,
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
+        response.raise_for_status()
+        
+        token_response = response.json()
+        access_token = token_response["access_token"]
+        expires_in = token_response.get("expires_in", 3600)
+        
+        # Cache the token
+        _token_cache.set_token(access_token, expires_in)
+        
+        return access_token
+        
     except httpx.HTTPStatusError as e:
         # TODO: Add structured logging for production
         error_detail = ""
@@ -94,11 +235,11 @@ async def get_access_token() -> str:
         except:
             error_detail = e.response.text
         
-        raise Exception(f"Authentication failed: {e.response.status_code} - {error_detail}")
+        raise GraphAuthError(f"Authentication failed: {e.response.status_code} - {error_detail}")
     
     except Exception as e:
         # TODO: Add proper error tracking/monitoring
-        raise Exception(f"Failed to obtain access token: {str(e)}")
+        raise GraphAPIError(f"Failed to obtain access token: {str(e)}")
 
 
 def clear_token_cache():
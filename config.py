@@ -17,12 +17,23 @@ class Settings(BaseSettings):
     # API Configuration
     host: str = "0.0.0.0"
     port: int = 8000
+    dev: bool = False  # Single worker with auto-reload
+    workers: int = 0  # 0 = one per CPU core, up to 4
+    
+    # Per-client rate limiting (requests per second, bucket size; 0 rate disables)
+    rate_limit_per_second: float = 5.0
+    rate_limit_burst: int = 20
     
     # Microsoft Graph API
     graph_api_base_url: str = "https://graph.microsoft.com/v1.0"
     auth_url_template: str = "https://login.microsoftonline.com/{tenant_id}/oauth2/v2.0/token"
     graph_scope: str = "https://graph.microsoft.com/.default"
     
+    # Graph first-page cache: pages are revalidated via ETag; a TTL > 0 also
+    # serves them without any request (possibly stale) for that many seconds
+    graph_page_cache_ttl: float = 0.0
+    graph_page_cache_size: int = 256
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
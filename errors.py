@@ -0,0 +1,44 @@
+"""
+Exception types raised by the authentication and Graph API layers.
+Each carries the HTTP status code the API should respond with.
+"""
+from typing import Optional
+
+
+class GraphAPIError(Exception):
+    """Base class for errors talking to Microsoft Identity platform or Graph API."""
+    status_code = 500
+
+
+class GraphBadRequestError(GraphAPIError):
+    """Graph API rejected the request parameters."""
+    status_code = 400
+
+
+class GraphAuthError(GraphAPIError):
+    """Authentication failed or the access token was rejected."""
+    status_code = 401
+
+
+class GraphPermissionError(GraphAPIError):
+    """The application lacks permissions for the requested resource."""
+    status_code = 403
+
+
+class GraphNotFoundError(GraphAPIError):
+    """The requested team, channel, or chat does not exist."""
+    status_code = 404
+
+
+class GraphThrottledError(GraphAPIError):
+    """Graph API kept throttling or was unavailable after all retries."""
+    status_code = 503
+    
+    def __init__(self, message: str, retry_after: Optional[str] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class GraphTimeoutError(GraphAPIError):
+    """Graph API did not respond in time."""
+    status_code = 504
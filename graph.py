@@ -2,18 +2,317 @@
 Microsoft Graph API helper functions.
 Handles fetching Teams and chat messages with pagination support.
 """
+import asyncio
+import itertools
+import sys
+import time
 import httpx
-from typing import List, Dict, Optional
-from datetime import datetime
-from auth import get_access_token
+import msgspec
+import orjson
+from collections import OrderedDict
+from typing import Any, AsyncIterator, List, Dict, Optional, Set, Tuple
+from datetime import datetime, timezone
+from functools import lru_cache
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+from auth import get_auth_headers
 from config import settings
+from errors import (
+    GraphAPIError,
+    GraphAuthError,
+    GraphBadRequestError,
+    GraphNotFoundError,
+    GraphPermissionError,
+    GraphThrottledError,
+    GraphTimeoutError,
+)
+
+
+# Maximum page size accepted by the Graph messages endpoints
+GRAPH_PAGE_SIZE = 50
+
+# Maximum number of requests Graph accepts in a single $batch call
+GRAPH_BATCH_LIMIT = 20
+
+# Status codes Graph uses for throttling and temporary unavailability
+RETRYABLE_STATUS_CODES = {429, 503}
+
+
+class _TransientGraphError(Exception):
+    """Raised for Graph responses that should be retried."""
+    
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"Graph API returned {response.status_code}")
+        self.response = response
+
+
+# Longest we wait between retries before handing the throttling to the client
+GRAPH_MAX_RETRY_WAIT = 30
+
+_backoff = wait_exponential_jitter(initial=0.5, max=GRAPH_MAX_RETRY_WAIT)
+
+
+def _wait_for_retry(retry_state) -> float:
+    """Wait for the exponential backoff or Graph's Retry-After, whichever is longer."""
+    delay = _backoff(retry_state)
+    error = retry_state.outcome.exception()
+    if isinstance(error, _TransientGraphError):
+        retry_after = error.response.headers.get("Retry-After")
+        try:
+            delay = max(float(retry_after), delay)
+        except (TypeError, ValueError):
+            pass
+        if delay > GRAPH_MAX_RETRY_WAIT:
+            # Don't hold the request open; let the client retry later
+            raise GraphThrottledError(
+                f"Throttled: Microsoft Graph API returned {error.response.status_code} "
+                f"with Retry-After {retry_after}",
+                retry_after=retry_after
+            )
+    return delay
+
+
+def _raise_after_retries(retry_state):
+    """Surface a response that was still throttled after the last attempt."""
+    error = retry_state.outcome.exception()
+    if isinstance(error, _TransientGraphError):
+        raise GraphThrottledError(
+            f"Throttled: Microsoft Graph API returned {error.response.status_code} "
+            f"after {retry_state.attempt_number} attempts",
+            retry_after=error.response.headers.get("Retry-After")
+        )
+    raise error
+
+
+class GraphPage(msgspec.Struct):
+    """One page of a Graph API collection response."""
+    value: List[Dict[str, Any]] = []
+    next_link: Optional[str] = msgspec.field(name="@odata.nextLink", default=None)
+
+
+# Decodes a page in a single pass, skipping envelope fields we don't use
+_page_decoder = msgspec.json.Decoder(GraphPage)
+
+# Cached ISO 8601 parser; adjacent messages often share timestamps.
+# Python 3.11+ accepts the trailing 'Z' directly.
+if sys.version_info >= (3, 11):
+    _parse_iso = lru_cache(maxsize=4096)(datetime.fromisoformat)
+else:
+    @lru_cache(maxsize=4096)
+    def _parse_iso(value: str) -> datetime:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+# First-page cache: URL -> (ETag, body, fresh-until), least recently used first
+_page_cache: "OrderedDict[str, Tuple[Optional[str], bytes, float]]" = OrderedDict()
+
+# In-flight first-page fetches by URL, so concurrent misses share one request
+_page_inflight: Dict[str, asyncio.Task] = {}
+
+# (endpoint kind, query option) pairs Graph has reported as unsupported,
+# e.g. ("channel", "select") or ("chat", "filter"); those options are no longer sent
+_rejected_query_options: Set[Tuple[str, str]] = set()
+
+# Shared HTTP client for Graph API requests, created in the app lifespan
+_graph_client: Optional[httpx.AsyncClient] = None
+
+
+async def init_graph_client():
+    """Create the shared HTTP client used for Graph API requests."""
+    global _graph_client
+    if _graph_client is None:
+        _graph_client = httpx.AsyncClient(
+            base_url=settings.graph_api_base_url,
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=200)
+        )
+
+
+async def close_graph_client():
+    """Close the shared HTTP client and release pooled connections."""
+    global _graph_client
+    if _graph_client is not None:
+        await _graph_client.aclose()
+        _graph_client = None
+
+
+def build_messages_endpoint(
+    team_id: Optional[str] = None,
+    channel_id: Optional[str] = None,
+    chat_id: Optional[str] = None
+) -> str:
+    """
+    Build the relative Graph endpoint for channel or chat messages.
+    
+    Raises:
+        ValueError: If invalid parameters provided
+    """
+    if chat_id:
+        if team_id or channel_id:
+            raise ValueError("Cannot specify both chat_id and team_id/channel_id")
+        return f"/chats/{chat_id}/messages"
+    elif team_id and channel_id:
+        return f"/teams/{team_id}/channels/{channel_id}/messages"
+    else:
+        raise ValueError("Must provide either chat_id OR both team_id and channel_id")
+
+
+@retry(
+    retry=retry_if_exception_type((_TransientGraphError, httpx.NetworkError)),
+    wait=_wait_for_retry,
+    stop=stop_after_attempt(5),
+    retry_error_callback=_raise_after_retries
+)
+async def _send(request: httpx.Request) -> httpx.Response:
+    """
+    Send a prepared request to Graph API, retrying throttled and transient failures.
+    
+    Requests are built once by the caller, so retries reuse the already
+    merged and parsed URL.
+    
+    Returns:
+        The response
+        
+    Raises:
+        GraphThrottledError: If Graph still answers 429/503 after the last attempt
+    """
+    response = await _graph_client.send(request)
+    if response.status_code in RETRYABLE_STATUS_CODES:
+        raise _TransientGraphError(response)
+    return response
+
+
+def _raise_for_page_status(response: httpx.Response):
+    """Raise the matching error for a failed page response."""
+    # Handle specific HTTP errors
+    if response.status_code == 401:
+        raise GraphAuthError("Unauthorized: Invalid or expired token")
+    elif response.status_code == 403:
+        raise GraphPermissionError("Forbidden: Insufficient permissions to access messages. "
+                      "Required permissions: Channel.ReadBasic.All, ChannelMessage.Read.All, "
+                      "or Chat.Read.All")
+    elif response.status_code == 404:
+        raise GraphNotFoundError("Not found: Team, channel, or chat does not exist")
+    
+    response.raise_for_status()
+
+
+def _unsupported_query_options(response: httpx.Response) -> Set[str]:
+    """
+    Return the query options a Graph 400 response reports as unsupported.
+    
+    Errors about the request itself (unknown properties, malformed ids)
+    yield an empty set.
+    """
+    try:
+        message = orjson.loads(response.content)["error"]["message"].lower()
+    except (orjson.JSONDecodeError, KeyError, TypeError, AttributeError):
+        return set()
+    if not any(phrase in message for phrase in ("not allowed", "not supported", "unsupported")):
+        return set()
+    return {option for option in ("select", "filter", "orderby") if option in message}
+
+
+async def _fetch_page(url: str, headers: httpx.Headers, params: Optional[Dict] = None) -> GraphPage:
+    """
+    Fetch a single page of results from Graph API.
+    
+    First pages are cached by URL and revalidated with If-None-Match when
+    Graph sent an ETag. With GRAPH_PAGE_CACHE_TTL > 0 they are also served
+    without any request while fresh, which may miss newer messages.
+    Concurrent requests for the same first page share one Graph request.
+    
+    Args:
+        url: Relative endpoint or absolute @odata.nextLink
+        headers: Request headers including the bearer token
+        params: Optional query parameters (first page only)
+        
+    Returns:
+        Decoded page
+    """
+    # Relative endpoints resolve against the client's base_url; absolute
+    # @odata.nextLink URLs are used as-is
+    request = _graph_client.build_request("GET", url, headers=headers, params=params)
+    
+    # @odata.nextLink pages carry unique $skiptokens and are never requested
+    # twice, so only first pages (the requests with params) are cached
+    if params is None or settings.graph_page_cache_size <= 0:
+        response = await _send(request)
+        _raise_for_page_status(response)
+        return _page_decoder.decode(response.content)
+    
+    key = str(request.url)
+    
+    cached = _page_cache.get(key)
+    if cached and time.monotonic() < cached[2]:
+        _page_cache.move_to_end(key)
+        return _page_decoder.decode(cached[1])
+    
+    task = _page_inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_revalidate_page(key, request, cached))
+        _page_inflight[key] = task
+        task.add_done_callback(lambda done: _forget_inflight(key, done))
+    
+    # Shielded so a caller that disconnects doesn't cancel the shared request
+    return await asyncio.shield(task)
+
+
+async def _revalidate_page(
+    key: str,
+    request: httpx.Request,
+    cached: Optional[Tuple[Optional[str], bytes, float]]
+) -> GraphPage:
+    """Fetch a first page, revalidating the cached copy if it has an ETag."""
+    if cached and cached[0]:
+        request.headers["If-None-Match"] = cached[0]
+    
+    response = await _send(request)
+    
+    if response.status_code == 304 and cached:
+        etag, body = cached[0], cached[1]
+    else:
+        _raise_for_page_status(response)
+        etag, body = response.headers.get("ETag"), response.content
+    
+    # Only cache bodies that decode, so a malformed response isn't replayed
+    page = _page_decoder.decode(body)
+    _store_page(key, etag, body)
+    return page
+
+
+def _forget_inflight(key: str, task: asyncio.Task):
+    """Drop a finished fetch from the in-flight table."""
+    if _page_inflight.get(key) is task:
+        del _page_inflight[key]
+    # Mark the error as retrieved in case every caller went away
+    if not task.cancelled():
+        task.exception()
+
+
+def _store_page(key: str, etag: Optional[str], body: bytes):
+    """Cache a page body, evicting the least recently used entries."""
+    _page_cache[key] = (etag, body, time.monotonic() + settings.graph_page_cache_ttl)
+    _page_cache.move_to_end(key)
+    while len(_page_cache) > settings.graph_page_cache_size:
+        _page_cache.popitem(last=False)
+
+
+def clear_page_cache():
+    """Clear cached Graph pages. Useful for testing or forced refresh."""
+    _page_cache.clear()
 
 
 async def fetch_graph_messages(
     team_id: Optional[str] = None,
     channel_id: Optional[str] = None,
     chat_id: Optional[str] = None,
-    since: Optional[str] = None
+    since: Optional[str] = None,
+    fields: Optional[str] = None
 ) -> List[Dict]:
     """
     Fetch messages from Microsoft Teams channel or chat.
@@ -22,113 +321,301 @@ async def fetch_graph_messages(
         team_id: Team ID (required for channel messages)
         channel_id: Channel ID (required for channel messages)
         chat_id: Chat ID (required for chat messages)
-        since: ISO 8601 timestamp to filter messages (client-side filtering)
+        since: ISO 8601 timestamp to filter messages (server-side for chats,
+            client-side for channels)
+        fields: Comma-separated message properties to return (e.g.
+            "id,createdDateTime,from,body"); all properties if omitted
         
     Returns:
         List of message objects from Graph API
         
     Raises:
         ValueError: If invalid parameters provided
-        httpx.HTTPStatusError: For API errors (401, 403, etc.)
-        Exception: For other errors
+        GraphAPIError: For authentication and Graph API errors (see errors.py)
     """
-    # Validate input parameters
-    if chat_id:
-        if team_id or channel_id:
-            raise ValueError("Cannot specify both chat_id and team_id/channel_id")
-        endpoint = f"{settings.graph_api_base_url}/chats/{chat_id}/messages"
-    elif team_id and channel_id:
-        endpoint = f"{settings.graph_api_base_url}/teams/{team_id}/channels/{channel_id}/messages"
-    else:
-        raise ValueError("Must provide either chat_id OR both team_id and channel_id")
+    # Collect per-page lists and flatten once at the end
+    pages = [
+        messages
+        async for messages in iter_graph_pages(team_id, channel_id, chat_id, since, fields)
+    ]
+    return list(itertools.chain.from_iterable(pages))
+
+
+async def iter_graph_messages(
+    team_id: Optional[str] = None,
+    channel_id: Optional[str] = None,
+    chat_id: Optional[str] = None,
+    since: Optional[str] = None,
+    fields: Optional[str] = None
+) -> AsyncIterator[Dict]:
+    """
+    Yield messages from Microsoft Teams channel or chat one at a time.
     
-    # Get access token
-    try:
-        access_token = await get_access_token()
-    except Exception as e:
-        raise Exception(f"Failed to authenticate: {str(e)}")
+    Takes the same arguments as fetch_graph_messages, but only holds one
+    page in memory at a time.
+    """
+    async for messages in iter_graph_pages(team_id, channel_id, chat_id, since, fields):
+        for message in messages:
+            yield message
+
+
+async def iter_graph_pages(
+    team_id: Optional[str] = None,
+    channel_id: Optional[str] = None,
+    chat_id: Optional[str] = None,
+    since: Optional[str] = None,
+    fields: Optional[str] = None
+) -> AsyncIterator[List[Dict]]:
+    """
+    Yield pages of messages from Microsoft Teams channel or chat.
     
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json"
-    }
+    Args:
+        team_id: Team ID (required for channel messages)
+        channel_id: Channel ID (required for channel messages)
+        chat_id: Chat ID (required for chat messages)
+        since: ISO 8601 timestamp to filter messages (server-side for chats,
+            client-side for channels)
+        fields: Comma-separated message properties to return (e.g.
+            "id,createdDateTime,from,body"); all properties if omitted
+        
+    Yields:
+        List of message objects from each Graph API page, after filtering
+        
+    Raises:
+        ValueError: If invalid parameters provided
+        GraphAPIError: For authentication and Graph API errors (see errors.py)
+    """
+    endpoint = build_messages_endpoint(team_id, channel_id, chat_id)
     
-    all_messages = []
-    next_link = endpoint
+    # Get request headers with a valid access token
+    try:
+        headers = await get_auth_headers()
+    except GraphAPIError as e:
+        raise type(e)(f"Failed to authenticate: {str(e)}")
     
-    # Parse since timestamp if provided for client-side filtering
+    # Parse since timestamp if provided
     since_datetime = None
     if since:
         try:
-            since_datetime = datetime.fromisoformat(since.replace('Z', '+00:00'))
+            since_datetime = _parse_iso(since)
         except ValueError:
             raise ValueError(f"Invalid ISO 8601 timestamp format: {since}")
+        if since_datetime.tzinfo is None:
+            since_datetime = since_datetime.replace(tzinfo=timezone.utc)
+    
+    # Request full pages to keep the number of sequential round trips low
+    params = {"$top": GRAPH_PAGE_SIZE}
+    
+    # Chat messages support filtering on createdDateTime server-side; channel
+    # messages don't, so those are still filtered after download. Skip the
+    # filter where Graph has already refused it
+    endpoint_kind = "chat" if chat_id else "channel"
+    server_filter = bool(chat_id and since_datetime) and (endpoint_kind, "filter") not in _rejected_query_options
+    
+    # Optional query options; Graph carries them over into @odata.nextLink
+    filter_options = {}
+    if server_filter:
+        since_literal = since_datetime.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        filter_options["$orderby"] = "createdDateTime desc"
+        filter_options["$filter"] = f"createdDateTime ge {since_literal}"
     
-    # TODO: Add rate limiting to respect Graph API throttling limits
-    # TODO: Implement exponential backoff retry logic for transient failures
+    # Project messages down to the requested fields to shrink every page;
+    # skip $select where Graph has already refused it
+    field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else []
+    use_select = bool(field_list) and (endpoint_kind, "select") not in _rejected_query_options
+    
+    # Lazily create the client when used outside the FastAPI lifespan
+    if _graph_client is None:
+        await init_graph_client()
+    
+    pending = None
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            while next_link:
-                # Fetch current page
-                response = await client.get(next_link, headers=headers)
-                
-                # Handle specific HTTP errors
-                if response.status_code == 401:
-                    raise Exception("Unauthorized: Invalid or expired token")
-                elif response.status_code == 403:
-                    raise Exception("Forbidden: Insufficient permissions to access messages. "
-                                  "Required permissions: Channel.ReadBasic.All, ChannelMessage.Read.All, "
-                                  "or Chat.Read.All")
-                elif response.status_code == 404:
-                    raise Exception("Not found: Team, channel, or chat does not exist")
-                
-                response.raise_for_status()
-                
-                data = response.json()
-                messages = data.get("value", [])
-                
-                # Apply client-side filtering by timestamp if needed
-                if since_datetime:
-                    filtered_messages = []
-                    for msg in messages:
-                        created_at_str = msg.get("createdDateTime")
-                        if created_at_str:
-                            try:
-                                created_at = datetime.fromisoformat(created_at_str.replace('Z', '+00:00'))
-                                if created_at >= since_datetime:
-                                    filtered_messages.append(msg)
-                            except ValueError:
-                                # Include message if timestamp parsing fails
+        # Drop query options Graph reports as unsupported until the first page
+        # succeeds; any other 400 (bad ids, unknown properties) goes to the caller
+        rejected = set()
+        while True:
+            select_list = field_list
+            if field_list and since_datetime and not server_filter and "createdDateTime" not in field_list:
+                # Client-side filtering still needs the timestamp
+                select_list = field_list + ["createdDateTime"]
+            
+            query = dict(params)
+            if server_filter:
+                query.update(filter_options)
+            if use_select:
+                query["$select"] = ",".join(select_list)
+            
+            try:
+                page = await _fetch_page(endpoint, headers, params=query)
+                break
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code != 400:
+                    raise
+                unsupported = _unsupported_query_options(e.response)
+                retry = False
+                if use_select and "select" in unsupported:
+                    use_select = False
+                    rejected.add("select")
+                    retry = True
+                if server_filter and unsupported & {"filter", "orderby"}:
+                    # Filter client-side instead
+                    server_filter = False
+                    rejected.add("filter")
+                    retry = True
+                if not retry:
+                    raise
+        
+        # Only remember rejections confirmed by a request that then succeeded
+        for option in rejected:
+            _rejected_query_options.add((endpoint_kind, option))
+        
+        # Trim client-side unless Graph already returned exactly the requested fields
+        client_select = bool(field_list) and not (use_select and select_list == field_list)
+        
+        while True:
+            # Start fetching the next page before processing this one so the
+            # network round trip overlaps with filtering
+            if page.next_link:
+                pending = asyncio.create_task(_fetch_page(page.next_link, headers))
+            
+            messages = page.value
+            
+            # Apply client-side filtering by timestamp if needed
+            if since_datetime and not server_filter:
+                parse = _parse_iso
+                filtered_messages = []
+                for msg in messages:
+                    created_at_str = msg.get("createdDateTime")
+                    if created_at_str:
+                        try:
+                            if parse(created_at_str) >= since_datetime:
                                 filtered_messages.append(msg)
-                    messages = filtered_messages
-                
-                all_messages.extend(messages)
-                
-                # Check for next page
-                next_link = data.get("@odata.nextLink")
-                
-                # TODO: Add configurable limit to prevent excessive pagination
-                # For production, consider adding a max_pages parameter
-                
+                        except ValueError:
+                            # Include message if timestamp parsing fails
+                            filtered_messages.append(msg)
+                messages = filtered_messages
+            
+            if client_select:
+                messages = [
+                    {field: msg[field] for field in field_list if field in msg}
+                    for msg in messages
+                ]
+            
+            yield messages
+            
+            # TODO: Add configurable limit to prevent excessive pagination
+            # For production, consider adding a max_pages parameter
+            
+            if not pending:
+                break
+            page = await pending
+            pending = None
+            
     except httpx.TimeoutException:
-        raise Exception("Request timeout: Microsoft Graph API did not respond in time")
+        raise GraphTimeoutError("Request timeout: Microsoft Graph API did not respond in time")
     except httpx.NetworkError as e:
-        raise Exception(f"Network error while contacting Microsoft Graph API: {str(e)}")
+        raise GraphAPIError(f"Network error while contacting Microsoft Graph API: {str(e)}")
     except httpx.HTTPStatusError as e:
-        error_detail = ""
         try:
-            error_detail = e.response.json()
-        except:
+            error_detail = orjson.loads(e.response.content)
+        except orjson.JSONDecodeError:
             error_detail = e.response.text
-        raise Exception(f"Graph API error: {e.response.status_code} - {error_detail}")
+        if e.response.status_code == 400:
+            raise GraphBadRequestError(f"Bad request: {error_detail}")
+        raise GraphAPIError(f"Graph API error: {e.response.status_code} - {error_detail}")
+    except GraphAPIError:
+        raise
     except Exception as e:
         # TODO: Add structured logging and error tracking
-        if "Failed to authenticate" in str(e) or "Unauthorized" in str(e) or "Forbidden" in str(e):
-            raise
-        raise Exception(f"Failed to fetch messages: {str(e)}")
+        raise GraphAPIError(f"Failed to fetch messages: {str(e)}")
+    finally:
+        # Don't leave an in-flight page request behind on errors or when
+        # the consumer stops early
+        if pending:
+            pending.cancel()
+
+
+async def fetch_graph_messages_batch(requests: List[Dict]) -> Dict[str, Dict]:
+    """
+    Execute several independent GET requests in one Graph $batch call.
     
-    return all_messages
+    Args:
+        requests: List of {"id", "method", "url"} dicts, with urls relative
+            to the Graph API version root (e.g. "/chats/{chat_id}/messages")
+        
+    Returns:
+        Dict mapping each request id to its response ({"status", "headers", "body"})
+        
+    Raises:
+        ValueError: If the request list is empty, too large, or has duplicate ids
+        GraphAPIError: For authentication and transport errors
+        
+    Note:
+        Graph does not follow @odata.nextLink inside a batch, so each entry
+        holds only the first page of its results.
+    """
+    if not requests:
+        raise ValueError("At least one request is required")
+    if len(requests) > GRAPH_BATCH_LIMIT:
+        raise ValueError(f"A batch may contain at most {GRAPH_BATCH_LIMIT} requests")
+    
+    request_ids = [str(req["id"]) for req in requests]
+    if len(set(request_ids)) != len(request_ids):
+        raise ValueError("Batch request ids must be unique")
+    
+    # Get request headers with a valid access token
+    try:
+        headers = await get_auth_headers()
+    except GraphAPIError as e:
+        raise type(e)(f"Failed to authenticate: {str(e)}")
+    
+    payload = {
+        "requests": [
+            {
+                "id": request_id,
+                "method": req.get("method", "GET"),
+                "url": req["url"]
+            }
+            for request_id, req in zip(request_ids, requests)
+        ]
+    }
+    
+    # Lazily create the client when used outside the FastAPI lifespan
+    if _graph_client is None:
+        await init_graph_client()
+    
+    try:
+        response = await _send(
+            _graph_client.build_request("POST", "/$batch", headers=headers, json=payload)
+        )
+        
+        if response.status_code == 401:
+            raise GraphAuthError("Unauthorized: Invalid or expired token")
+        
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        
+    except httpx.TimeoutException:
+        raise GraphTimeoutError("Request timeout: Microsoft Graph API did not respond in time")
+    except httpx.NetworkError as e:
+        raise GraphAPIError(f"Network error while contacting Microsoft Graph API: {str(e)}")
+    except httpx.HTTPStatusError as e:
+        try:
+            error_detail = orjson.loads(e.response.content)
+        except orjson.JSONDecodeError:
+            error_detail = e.response.text
+        raise GraphAPIError(f"Graph API error: {e.response.status_code} - {error_detail}")
+    
+    # Responses may arrive in any order; demultiplex them by id
+    return {
+        item["id"]: {
+            "status": item.get("status"),
+            "headers": item.get("headers", {}),
+            "body": item.get("body", {})
+        }
+        for item in data.get("responses", [])
+    }
 
 
 async def get_message_replies(
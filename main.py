@@ -1,28 +1,85 @@
 """
 FastAPI application for fetching Microsoft Teams messages via Graph API.
 """
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import JSONResponse
-from typing import Optional, List, Dict
-from pydantic import BaseModel, Field
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Query
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+from typing import AsyncIterator, Optional, List, Dict
+from pydantic import BaseModel, Field, SkipValidation
+import orjson
+import os
+import sys
 import uvicorn
 
-from graph import fetch_graph_messages
+from auth import init_auth_client, close_auth_client, start_token_refresh, stop_token_refresh
+from graph import (
+    GRAPH_BATCH_LIMIT,
+    GRAPH_PAGE_SIZE,
+    build_messages_endpoint,
+    close_graph_client,
+    fetch_graph_messages,
+    fetch_graph_messages_batch,
+    init_graph_client,
+    iter_graph_messages,
+)
 from config import settings
+from errors import GraphAPIError, GraphThrottledError, GraphTimeoutError
+from ratelimit import rate_limit, start_limiter_cleanup, stop_limiter_cleanup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared HTTP clients and start background tasks on startup; undo on shutdown."""
+    await init_auth_client()
+    await init_graph_client()
+    await start_token_refresh()
+    await start_limiter_cleanup()
+    try:
+        yield
+    finally:
+        await stop_limiter_cleanup()
+        await stop_token_refresh()
+        await close_graph_client()
+        await close_auth_client()
 
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Microsoft Teams Message Fetcher",
     description="API to fetch messages from Microsoft Teams channels and chats using Microsoft Graph API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 
 class MessageResponse(BaseModel):
     """Response model for messages endpoint."""
     count: int = Field(..., description="Number of messages returned")
-    messages: List[Dict] = Field(..., description="List of message objects from Graph API")
+    # Graph payloads are passed through as-is; validating each dict is pure overhead
+    messages: SkipValidation[List[Dict]] = Field(..., description="List of message objects from Graph API")
+
+
+class MessageQuery(BaseModel):
+    """A single channel or chat query within a batch request."""
+    id: Optional[str] = Field(None, description="Caller-chosen id for this query (defaults to its index)")
+    team_id: Optional[str] = Field(None, description="Team ID (for channel messages)")
+    channel_id: Optional[str] = Field(None, description="Channel ID (for channel messages)")
+    chat_id: Optional[str] = Field(None, description="Chat ID (for chat messages)")
+
+
+class BatchMessageResult(BaseModel):
+    """Result of a single query within a batch request."""
+    status: int = Field(..., description="HTTP status returned by Graph API for this query")
+    count: int = Field(0, description="Number of messages returned")
+    messages: SkipValidation[List[Dict]] = Field(default_factory=list, description="First page of message objects")
+    next_link: Optional[str] = Field(None, description="Graph @odata.nextLink for the remaining pages")
+    error: Optional[Dict] = Field(None, description="Graph API error body for failed queries")
+
+
+class BatchMessageResponse(BaseModel):
+    """Response model for the batch messages endpoint."""
+    results: Dict[str, BatchMessageResult] = Field(..., description="Query results keyed by query id")
 
 
 class ErrorResponse(BaseModel):
@@ -44,12 +101,15 @@ async def root():
 @app.get(
     "/messages",
     response_model=MessageResponse,
+    dependencies=[Depends(rate_limit)],
     responses={
         400: {"model": ErrorResponse, "description": "Bad Request - Invalid parameters"},
         401: {"model": ErrorResponse, "description": "Unauthorized - Authentication failed"},
         403: {"model": ErrorResponse, "description": "Forbidden - Insufficient permissions"},
         404: {"model": ErrorResponse, "description": "Not Found - Resource does not exist"},
-        500: {"model": ErrorResponse, "description": "Internal Server Error"}
+        429: {"model": ErrorResponse, "description": "Too Many Requests - Rate limit exceeded"},
+        500: {"model": ErrorResponse, "description": "Internal Server Error"},
+        503: {"model": ErrorResponse, "description": "Service Unavailable - Graph API throttling"}
     }
 )
 async def get_messages(
@@ -69,6 +129,11 @@ async def get_messages(
         None,
         description="ISO 8601 timestamp to filter messages created after this time (e.g., 2024-01-01T00:00:00Z)",
         example="2024-01-01T00:00:00Z"
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated message properties to return (all properties if omitted)",
+        example="id,createdDateTime,from,body"
     )
 ):
     """
@@ -86,47 +151,32 @@ async def get_messages(
     - For channel messages: Provide both `team_id` and `channel_id`
     - For chat messages: Provide `chat_id` only
     - Optionally provide `since` parameter to filter messages by timestamp
+    - Optionally provide `fields` to return only selected message properties
     
     **Returns:**
     - All messages with automatic pagination handling
     - Messages are returned in the order provided by Graph API
     """
-    # TODO: Add request rate limiting per client
     # TODO: Add structured logging for request tracking and audit
     
     try:
-        # Validate mutually exclusive parameters
-        if chat_id and (team_id or channel_id):
-            raise HTTPException(
-                status_code=400,
-                detail="Cannot specify both chat_id and team_id/channel_id. "
-                       "Use chat_id for chat messages OR team_id + channel_id for channel messages."
-            )
-        
-        if not chat_id and not (team_id and channel_id):
-            raise HTTPException(
-                status_code=400,
-                detail="Must provide either chat_id OR both team_id and channel_id"
-            )
-        
-        if (team_id and not channel_id) or (channel_id and not team_id):
-            raise HTTPException(
-                status_code=400,
-                detail="Both team_id and channel_id are required for channel messages"
-            )
+        _validate_message_target(team_id, channel_id, chat_id)
         
         # Fetch messages from Graph API
         messages = await fetch_graph_messages(
             team_id=team_id,
             channel_id=channel_id,
             chat_id=chat_id,
-            since=since
+            since=since,
+            fields=fields
         )
         
-        return MessageResponse(
-            count=len(messages),
-            messages=messages
-        )
+        # Return the response directly so FastAPI skips the response_model
+        # round trip; MessageResponse still documents the schema
+        return ORJSONResponse({
+            "count": len(messages),
+            "messages": messages
+        })
         
     except HTTPException:
         # Re-raise HTTPException as-is
@@ -137,36 +187,237 @@ async def get_messages(
         raise HTTPException(status_code=400, detail=str(e))
         
     except Exception as e:
-        error_message = str(e)
+        raise _to_http_exception(e)
+
+
+@app.get(
+    "/messages/stream",
+    response_class=StreamingResponse,
+    dependencies=[Depends(rate_limit)],
+    responses={
+        200: {"content": {"application/x-ndjson": {}}, "description": "Newline-delimited JSON messages"},
+        400: {"model": ErrorResponse, "description": "Bad Request - Invalid parameters"},
+        401: {"model": ErrorResponse, "description": "Unauthorized - Authentication failed"},
+        403: {"model": ErrorResponse, "description": "Forbidden - Insufficient permissions"},
+        404: {"model": ErrorResponse, "description": "Not Found - Resource does not exist"},
+        429: {"model": ErrorResponse, "description": "Too Many Requests - Rate limit exceeded"},
+        500: {"model": ErrorResponse, "description": "Internal Server Error"},
+        503: {"model": ErrorResponse, "description": "Service Unavailable - Graph API throttling"}
+    }
+)
+async def stream_messages(
+    team_id: Optional[str] = Query(
+        None,
+        description="Team ID (required for channel messages, mutually exclusive with chat_id)"
+    ),
+    channel_id: Optional[str] = Query(
+        None,
+        description="Channel ID (required for channel messages, must be used with team_id)"
+    ),
+    chat_id: Optional[str] = Query(
+        None,
+        description="Chat ID (required for chat messages, mutually exclusive with team_id/channel_id)"
+    ),
+    since: Optional[str] = Query(
+        None,
+        description="ISO 8601 timestamp to filter messages created after this time (e.g., 2024-01-01T00:00:00Z)",
+        example="2024-01-01T00:00:00Z"
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated message properties to return (all properties if omitted)",
+        example="id,createdDateTime,from,body"
+    )
+):
+    """
+    Stream messages from a Microsoft Teams channel or chat as NDJSON.
+    
+    Takes the same parameters as `GET /messages`, but writes one JSON
+    message per line while later pages are still being fetched, so the
+    first messages arrive after a single Graph API round trip and memory
+    use stays bounded by the page size.
+    
+    Errors on the first page are returned with the usual status codes.
+    Errors on later pages end the stream early, since the status has
+    already been sent.
+    """
+    try:
+        _validate_message_target(team_id, channel_id, chat_id)
         
-        # Map specific errors to appropriate HTTP status codes
-        if "Unauthorized" in error_message or "Invalid or expired token" in error_message:
-            raise HTTPException(
-                status_code=401,
-                detail=error_message
-            )
-        elif "Forbidden" in error_message or "Insufficient permissions" in error_message:
-            raise HTTPException(
-                status_code=403,
-                detail=error_message
-            )
-        elif "Not found" in error_message:
-            raise HTTPException(
-                status_code=404,
-                detail=error_message
-            )
-        elif "timeout" in error_message.lower():
-            raise HTTPException(
-                status_code=504,
-                detail="Gateway Timeout: Request to Microsoft Graph API timed out"
-            )
-        else:
-            # Generic server error
-            # TODO: Log full stack trace for debugging
+        messages = iter_graph_messages(
+            team_id=team_id,
+            channel_id=channel_id,
+            chat_id=chat_id,
+            since=since,
+            fields=fields
+        )
+        
+        # Pull the first message before responding so setup errors
+        # (auth, permissions, bad ids) still map to proper status codes
+        try:
+            first = await anext(messages)
+        except StopAsyncIteration:
+            first = None
+        
+    except HTTPException:
+        raise
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+        
+    except Exception as e:
+        raise _to_http_exception(e)
+    
+    return StreamingResponse(
+        _ndjson(first, messages),
+        media_type="application/x-ndjson"
+    )
+
+
+async def _ndjson(first: Optional[Dict], messages: AsyncIterator[Dict]) -> AsyncIterator[bytes]:
+    """Encode messages as newline-delimited JSON."""
+    if first is None:
+        return
+    try:
+        yield orjson.dumps(first) + b"\n"
+        async for message in messages:
+            yield orjson.dumps(message) + b"\n"
+    except GraphAPIError:
+        # The status line is already sent; end the stream early instead
+        return
+    finally:
+        await messages.aclose()
+
+
+@app.post(
+    "/messages/batch",
+    response_model=BatchMessageResponse,
+    dependencies=[Depends(rate_limit)],
+    responses={
+        400: {"model": ErrorResponse, "description": "Bad Request - Invalid parameters"},
+        401: {"model": ErrorResponse, "description": "Unauthorized - Authentication failed"},
+        429: {"model": ErrorResponse, "description": "Too Many Requests - Rate limit exceeded"},
+        500: {"model": ErrorResponse, "description": "Internal Server Error"},
+        503: {"model": ErrorResponse, "description": "Service Unavailable - Graph API throttling"}
+    }
+)
+async def get_messages_batch(queries: List[MessageQuery]):
+    """
+    Fetch the first page of messages for several channels or chats at once.
+    
+    All queries are sent to Microsoft Graph as a single `$batch` request,
+    so they share one HTTP round trip and are executed in parallel by Graph.
+    
+    **Usage:**
+    - Each query provides either `chat_id` or both `team_id` and `channel_id`
+    - Up to 20 queries per request
+    
+    **Returns:**
+    - One result per query id with its status, messages and `next_link`
+    - Failures of individual queries are reported per result, not as an error response
+    """
+    try:
+        if len(queries) > GRAPH_BATCH_LIMIT:
             raise HTTPException(
-                status_code=500,
-                detail=f"Internal server error: {error_message}"
+                status_code=400,
+                detail=f"A batch may contain at most {GRAPH_BATCH_LIMIT} queries"
             )
+        
+        requests = []
+        for index, query in enumerate(queries):
+            endpoint = build_messages_endpoint(query.team_id, query.channel_id, query.chat_id)
+            requests.append({
+                "id": query.id if query.id is not None else str(index),
+                "method": "GET",
+                "url": f"{endpoint}?$top={GRAPH_PAGE_SIZE}"
+            })
+        
+        responses = await fetch_graph_messages_batch(requests)
+        
+        results = {}
+        for request_id, response in responses.items():
+            body = response["body"] or {}
+            if 200 <= response["status"] < 300:
+                messages = body.get("value", [])
+                results[request_id] = BatchMessageResult(
+                    status=response["status"],
+                    count=len(messages),
+                    messages=messages,
+                    next_link=body.get("@odata.nextLink")
+                )
+            else:
+                results[request_id] = BatchMessageResult(
+                    status=response["status"],
+                    error=body.get("error", body)
+                )
+        
+        return BatchMessageResponse(results=results)
+        
+    except HTTPException:
+        raise
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+        
+    except Exception as e:
+        raise _to_http_exception(e)
+
+
+def _validate_message_target(
+    team_id: Optional[str],
+    channel_id: Optional[str],
+    chat_id: Optional[str]
+):
+    """Validate that exactly one of a chat or a team/channel pair is given."""
+    # Validate mutually exclusive parameters
+    if chat_id and (team_id or channel_id):
+        raise HTTPException(
+            status_code=400,
+            detail="Cannot specify both chat_id and team_id/channel_id. "
+                   "Use chat_id for chat messages OR team_id + channel_id for channel messages."
+        )
+    
+    if not chat_id and not (team_id and channel_id):
+        raise HTTPException(
+            status_code=400,
+            detail="Must provide either chat_id OR both team_id and channel_id"
+        )
+    
+    if (team_id and not channel_id) or (channel_id and not team_id):
+        raise HTTPException(
+            status_code=400,
+            detail="Both team_id and channel_id are required for channel messages"
+        )
+
+
+def _to_http_exception(error: Exception) -> HTTPException:
+    """Map an error raised by the Graph/auth layer to an HTTPException."""
+    if isinstance(error, GraphTimeoutError):
+        return HTTPException(
+            status_code=504,
+            detail="Gateway Timeout: Request to Microsoft Graph API timed out"
+        )
+    
+    if isinstance(error, GraphThrottledError):
+        return HTTPException(
+            status_code=503,
+            detail=str(error),
+            headers={"Retry-After": error.retry_after} if error.retry_after else None
+        )
+    
+    # Client-facing errors (401, 403, 404) carry their own status code
+    if isinstance(error, GraphAPIError) and error.status_code < 500:
+        return HTTPException(
+            status_code=error.status_code,
+            detail=str(error)
+        )
+    
+    # Generic server error
+    # TODO: Log full stack trace for debugging
+    return HTTPException(
+        status_code=500,
+        detail=f"Internal server error: {str(error)}"
+    )
 
 
 @app.exception_handler(Exception)
@@ -188,12 +439,20 @@ async def global_exception_handler(request, exc):
 
 if __name__ == "__main__":
     # Run the application
-    # TODO: For production, use a production ASGI server with proper configuration
     # TODO: Add HTTPS/TLS termination
-    # TODO: Configure workers based on CPU cores
-    uvicorn.run(
-        "main:app",
-        host=settings.host,
-        port=settings.port,
-        reload=True  # Disable in production
-    )
+    if settings.dev:
+        uvicorn.run(
+            "main:app",
+            host=settings.host,
+            port=settings.port,
+            reload=True
+        )
+    else:
+        uvicorn.run(
+            "main:app",
+            host=settings.host,
+            port=settings.port,
+            loop="uvloop" if sys.platform != "win32" else "asyncio",
+            http="httptools",
+            workers=settings.workers or min(4, os.cpu_count() or 1)
+        )
@@ -0,0 +1,120 @@
+"""
+Per-client rate limiting for the API endpoints.
+Token bucket kept in process memory, so each worker limits independently.
+"""
+import asyncio
+import math
+import time
+from typing import Dict, List, Optional
+from fastapi import HTTPException, Request
+from config import settings
+
+
+class Limiter:
+    """Token bucket rate limiter keyed by client."""
+    
+    def __init__(self, rate: float, burst: int):
+        """
+        Args:
+            rate: Tokens added per second
+            burst: Maximum tokens a bucket can hold
+        """
+        self.rate = rate
+        self.burst = burst
+        # key -> [tokens, last refill time]; lists are mutated in place
+        self._buckets: Dict[str, List[float]] = {}
+    
+    def allow(self, key: str) -> bool:
+        """Take a token from the key's bucket if one is available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.burst), now]
+        
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return True
+        bucket[0] = tokens
+        return False
+    
+    def retry_after(self, key: str) -> float:
+        """Seconds until the key's bucket holds a full token again."""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return 0.0
+        return max(0.0, (1 - bucket[0]) / self.rate)
+    
+    def evict_stale(self) -> int:
+        """
+        Drop buckets that have refilled completely.
+        
+        A full bucket behaves exactly like a missing one, so this only
+        reclaims memory.
+        
+        Returns:
+            Number of buckets removed
+        """
+        now = time.monotonic()
+        stale = [
+            key for key, (tokens, last) in self._buckets.items()
+            if tokens + (now - last) * self.rate >= self.burst
+        ]
+        for key in stale:
+            del self._buckets[key]
+        return len(stale)
+
+
+# Global limiter instance
+_limiter = Limiter(settings.rate_limit_per_second, settings.rate_limit_burst)
+
+# How often idle buckets are evicted, in seconds
+LIMITER_CLEANUP_INTERVAL = 60
+
+_cleanup_task: Optional[asyncio.Task] = None
+
+
+async def rate_limit(request: Request):
+    """
+    FastAPI dependency enforcing the per-client request rate.
+    
+    Raises:
+        HTTPException: 429 with a Retry-After header when the client is over its limit
+    """
+    if settings.rate_limit_per_second <= 0:
+        return
+    
+    key = request.client.host if request.client else "unknown"
+    if not _limiter.allow(key):
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests: rate limit exceeded",
+            headers={"Retry-After": str(math.ceil(_limiter.retry_after(key)))}
+        )
+
+
+async def _cleanup_loop():
+    """Periodically evict idle client buckets."""
+    while True:
+        await asyncio.sleep(LIMITER_CLEANUP_INTERVAL)
+        _limiter.evict_stale()
+
+
+async def start_limiter_cleanup():
+    """Start the background task that evicts idle client buckets."""
+    global _cleanup_task
+    if _cleanup_task is None:
+        _cleanup_task = asyncio.create_task(_cleanup_loop())
+
+
+async def stop_limiter_cleanup():
+    """Stop the bucket eviction task."""
+    global _cleanup_task
+    if _cleanup_task is not None:
+        _cleanup_task.cancel()
+        try:
+            await _cleanup_task
+        except asyncio.CancelledError:
+            pass
+        _cleanup_task = None